@@ -1 +1,2 @@
 from .client import DatabaseClient
+from .async_client import AsyncDatabaseClient
@@ -0,0 +1,60 @@
+try:
+    import asyncpg
+except ImportError:
+    asyncpg = None
+from typing import List, Tuple, Any
+
+
+class AsyncDatabaseClient:
+    def __init__(self, host: str = '', port: int = 0, database: str = '', user: str = '', password: str = '',
+                 min_size: int = 1, max_size: int = 10):
+        if asyncpg is None:
+            raise ImportError("AsyncDatabaseClient requires asyncpg; install it with 'pip install asyncpg'.")
+        self.host = host
+        self.port = port
+        self.database = database
+        self.user = user
+        self.password = password
+        self.min_size = min_size
+        self.max_size = max_size
+        self.pool = None
+
+    async def connect(self):
+        self.pool = await asyncpg.create_pool(
+            host=self.host,
+            port=self.port,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            min_size=self.min_size,
+            max_size=self.max_size
+        )
+
+    async def close(self):
+        if self.pool:
+            await self.pool.close()
+            self.pool = None
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def fetch(self, table_name: str, columns: List[str], condition: str = "",
+                    condition_value: Tuple = ()) -> List[Tuple[Any]]:
+        columns_str = ", ".join(columns)
+        query = f"SELECT {columns_str} FROM {table_name}"
+        if condition:
+            query += f" WHERE {condition}"
+        return await self.execute_query(query, condition_value)
+
+    async def execute_query(self, query: str, params: Tuple = ()) -> List[Tuple[Any]]:
+        async with self.pool.acquire() as conn:
+            rows = await conn.fetch(query, *params)
+        return [tuple(row) for row in rows]
+
+    async def batch_insert(self, table_name: str, columns: List[str], values_list: List[Tuple]):
+        async with self.pool.acquire() as conn:
+            await conn.copy_records_to_table(table_name, records=values_list, columns=columns)
@@ -0,0 +1,413 @@
+from abc import ABC, abstractmethod
+import sqlite3
+import mariadb
+import psycopg2
+import psycopg2.pool
+from psycopg2.extras import execute_values
+from typing import List, Tuple, Any, Dict, Set, Iterable, Iterator
+import csv
+import functools
+import hashlib
+import itertools
+import threading
+
+
+_cursor_ids = itertools.count()
+
+
+@functools.lru_cache(maxsize=256)
+def _placeholders(placeholder: str, count: int) -> str:
+    return ", ".join([placeholder] * count)
+
+
+def _encode_binary_rows(rows: Iterable[Tuple], indexes: List[int]) -> Iterator[List[Any]]:
+    # Binary values are written in PostgreSQL's bytea hex format so every backend reads them back alike.
+    for row in rows:
+        row = list(row)
+        for i in indexes:
+            value = row[i]
+            if isinstance(value, (bytes, bytearray, memoryview)):
+                row[i] = '\\x' + bytes(value).hex()
+        yield row
+
+
+def _decode_binary_rows(rows: Iterable[List[str]], indexes: List[int]) -> Iterator[List[Any]]:
+    for row in rows:
+        for i in indexes:
+            value = row[i]
+            if value.startswith('\\x'):
+                # Values that are not valid hex are stored as they were written.
+                try:
+                    row[i] = bytes.fromhex(value[2:])
+                except ValueError:
+                    pass
+        yield row
+
+
+class _Backend(ABC):
+    placeholder = '%s'
+    parallel_imports = True
+
+    def __init__(self, host: str = '', port: int = 0, database: str = '', user: str = '', password: str = '',
+                 use_pool: bool = False, pool_size: int = 5, local_infile: bool = False, pool_timeout: float = 30.0):
+        self.host = host
+        self.port = port
+        self.database = database
+        self.user = user
+        self.password = password
+        self.use_pool = use_pool
+        self.pool_size = pool_size
+        self.local_infile = local_infile
+        self.pool_timeout = pool_timeout
+        self.pool = None
+
+    @abstractmethod
+    def connect(self):
+        pass
+
+    def release(self, conn, prepared: bool = False):
+        conn.close()
+
+    def begin(self, conn, immediate: bool = False):
+        pass
+
+    def insert_query(self, cursor, table_name: str, columns: List[str], count: int, prepared: Set[str]) -> str:
+        placeholders = _placeholders(self.placeholder, count)
+        columns_str = ", ".join(columns)
+        return f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})"
+
+    def insert_rows(self, cursor, table_name: str, columns: List[str], values_list: List[Tuple]):
+        placeholders = _placeholders(self.placeholder, len(columns))
+        columns_str = ", ".join(columns)
+        query = f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})"
+        cursor.executemany(query, values_list)
+
+    def insert_chunks(self, cursor, table_name: str, columns: List[str], rows: Iterable[Tuple], chunk_size: int):
+        rows = iter(rows)
+        while True:
+            chunk = list(itertools.islice(rows, chunk_size))
+            if not chunk:
+                break
+            self.insert_rows(cursor, table_name, columns, chunk)
+
+    @abstractmethod
+    def table_exists(self, cursor, table_name: str) -> bool:
+        pass
+
+    @abstractmethod
+    def column_exists(self, cursor, table_name: str, column_name: str) -> bool:
+        pass
+
+    @abstractmethod
+    def binary_columns(self, cursor, table_name: str) -> Set[str]:
+        pass
+
+    def stream_cursor(self, conn, arraysize: int):
+        cursor = conn.cursor()
+        cursor.arraysize = arraysize
+        return cursor
+
+    def export_csv(self, conn, cursor, table_name: str, csv_path: str, chunk_size: int):
+        binary_columns = self.binary_columns(cursor, table_name)
+        export_cursor = self.stream_cursor(conn, chunk_size)
+        try:
+            query = f"SELECT * FROM {table_name}"
+            export_cursor.execute(query)
+            columns = [desc[0] for desc in export_cursor.description]
+            indexes = [i for i, column in enumerate(columns) if column in binary_columns]
+            rows = _encode_binary_rows(export_cursor, indexes) if indexes else export_cursor
+
+            with open(csv_path, 'w', newline='') as csvfile:
+                csv_writer = csv.writer(csvfile)
+                csv_writer.writerow(columns)
+                csv_writer.writerows(rows)
+        finally:
+            export_cursor.close()
+
+    def import_csv(self, conn, cursor, table_name: str, csv_path: str, chunk_size: int):
+        binary_columns = self.binary_columns(cursor, table_name)
+        with open(csv_path, newline='') as csvfile:
+            csv_reader = csv.reader(csvfile)
+            columns = next(csv_reader)
+            indexes = [i for i, column in enumerate(columns) if column in binary_columns]
+            rows = _decode_binary_rows(csv_reader, indexes) if indexes else csv_reader
+            self.begin(conn, immediate=True)
+            self.insert_chunks(cursor, table_name, columns, rows, chunk_size)
+
+
+class _PooledBackend(_Backend):
+    pool_error = Exception
+    # Shared by all clients: pool key -> (driver pool, semaphore counting its free connections).
+    _pools: Dict[str, Tuple[Any, threading.BoundedSemaphore]] = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool_slots = None
+
+    def _pool_key(self) -> str:
+        # The password digest keeps a client with other credentials from reusing authenticated connections.
+        secret = hashlib.sha256(self.password.encode()).hexdigest()
+        return f"{self.name}://{self.user}:{secret}@{self.host}:{self.port}/{self.database}#{self.pool_size}"
+
+    def connect(self):
+        if not self.use_pool:
+            return self._connect()
+        if self.pool is None:
+            key = self._pool_key()
+            with self._pools_lock:
+                if key not in self._pools:
+                    self._pools[key] = (self._create_pool(key), threading.BoundedSemaphore(self.pool_size))
+                self.pool, self.pool_slots = self._pools[key]
+        # The driver pools raise instead of waiting when they are exhausted, so wait for a free slot first.
+        if not self.pool_slots.acquire(timeout=self.pool_timeout):
+            raise self.pool_error(f"No free connection in the {self.name} pool after {self.pool_timeout} seconds")
+        try:
+            return self._get_pooled(self.pool)
+        except BaseException:
+            self.pool_slots.release()
+            raise
+
+    def release(self, conn, prepared: bool = False):
+        if self.pool is None:
+            conn.close()
+            return
+        try:
+            self._put_pooled(self.pool, conn, prepared)
+        finally:
+            self.pool_slots.release()
+
+    @abstractmethod
+    def _connect(self):
+        pass
+
+    @abstractmethod
+    def _create_pool(self, key: str):
+        pass
+
+    @abstractmethod
+    def _get_pooled(self, pool):
+        pass
+
+    @abstractmethod
+    def _put_pooled(self, pool, conn, prepared: bool):
+        pass
+
+
+class _SqliteBackend(_Backend):
+    name = 'sqlite'
+    placeholder = '?'
+    # SQLite allows a single writer at a time, so concurrent imports would only contend for the lock.
+    parallel_imports = False
+
+    def connect(self):
+        conn = sqlite3.connect(self.database)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA cache_size=-65536")
+        return conn
+
+    def begin(self, conn, immediate: bool = False):
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+
+    def table_exists(self, cursor, table_name: str) -> bool:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table_name,))
+        return cursor.fetchone() is not None
+
+    def column_exists(self, cursor, table_name: str, column_name: str) -> bool:
+        cursor.execute("SELECT 1 FROM pragma_table_info(?) WHERE name = ?", (table_name, column_name))
+        return cursor.fetchone() is not None
+
+    def binary_columns(self, cursor, table_name: str) -> Set[str]:
+        cursor.execute("SELECT name FROM pragma_table_info(?) WHERE upper(type) LIKE '%BLOB%'", (table_name,))
+        return {row[0] for row in cursor.fetchall()}
+
+
+class _MariaBackend(_PooledBackend):
+    name = 'mariadb'
+    pool_error = mariadb.PoolError
+
+    def _pool_key(self) -> str:
+        # Connections with LOCAL INFILE enabled are never shared with clients that did not ask for it.
+        return super()._pool_key() + ("+local_infile" if self.local_infile else "")
+
+    def _connect(self):
+        return mariadb.connect(
+            host=self.host,
+            port=self.port,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            local_infile=self.local_infile
+        )
+
+    def _create_pool(self, key: str):
+        return mariadb.ConnectionPool(
+            pool_name="db_client_" + hashlib.sha256(key.encode()).hexdigest()[:32],
+            pool_size=self.pool_size,
+            host=self.host,
+            port=self.port,
+            database=self.database,
+            user=self.user,
+            password=self.password,
+            local_infile=self.local_infile
+        )
+
+    def _get_pooled(self, pool):
+        return pool.get_connection()
+
+    def _put_pooled(self, pool, conn, prepared: bool):
+        # Pooled MariaDB connections go back to their pool on close().
+        conn.close()
+
+    def table_exists(self, cursor, table_name: str) -> bool:
+        query = "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s"
+        cursor.execute(query, (table_name,))
+        return cursor.fetchone()[0] > 0
+
+    def column_exists(self, cursor, table_name: str, column_name: str) -> bool:
+        query = ("SELECT COUNT(*) FROM information_schema.columns WHERE table_schema = DATABASE() "
+                 "AND table_name = %s AND column_name = %s")
+        cursor.execute(query, (table_name, column_name))
+        return cursor.fetchone()[0] > 0
+
+    def binary_columns(self, cursor, table_name: str) -> Set[str]:
+        query = ("SELECT column_name FROM information_schema.columns WHERE table_schema = DATABASE() "
+                 "AND table_name = %s AND data_type IN "
+                 "('binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob')")
+        cursor.execute(query, (table_name,))
+        return {row[0] for row in cursor.fetchall()}
+
+    def stream_cursor(self, conn, arraysize: int):
+        cursor = conn.cursor(buffered=False)
+        cursor.arraysize = arraysize
+        return cursor
+
+    def import_csv(self, conn, cursor, table_name: str, csv_path: str, chunk_size: int):
+        # LOCAL INFILE lets the server read client files, so it is only used when the client opted in.
+        if not self.local_infile:
+            super().import_csv(conn, cursor, table_name, csv_path, chunk_size)
+            return
+        binary_columns = self.binary_columns(cursor, table_name)
+        with open(csv_path, newline='') as csvfile:
+            header = csvfile.readline()
+        columns = next(csv.reader([header]))
+        # Binary columns arrive as \x-prefixed hex (see _encode_binary_rows) and are decoded on load.
+        columns_str = ", ".join(f"@{column}" if column in binary_columns else column for column in columns)
+        set_clause = ", ".join(
+            f"{column} = IF(LEFT(@{column}, 2) = '\\\\x', "
+            f"COALESCE(UNHEX(SUBSTRING(@{column}, 3)), @{column}), @{column})"
+            for column in columns if column in binary_columns
+        )
+        line_terminator = '\\r\\n' if header.endswith('\r\n') else '\\n'
+        query = (f"LOAD DATA LOCAL INFILE %s INTO TABLE {table_name} "
+                 "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' ESCAPED BY '' "
+                 f"LINES TERMINATED BY '{line_terminator}' IGNORE 1 ROWS ({columns_str})")
+        if set_clause:
+            query += f" SET {set_clause}"
+        cursor.execute(query, (csv_path,))
+        # LOAD DATA downgrades conversion and duplicate-key errors to warnings; treat them as failures
+        # like the executemany path would.
+        cursor.execute("SHOW WARNINGS")
+        warnings = cursor.fetchall()
+        if warnings:
+            raise mariadb.DataError(f"LOAD DATA reported {len(warnings)} warning(s) for {csv_path}: {warnings[0][2]}")
+
+
+class _PgBackend(_PooledBackend):
+    name = 'postgresql'
+    pool_error = psycopg2.pool.PoolError
+
+    def _connect(self):
+        return psycopg2.connect(
+            host=self.host,
+            port=self.port,
+            database=self.database,
+            user=self.user,
+            password=self.password
+        )
+
+    def _create_pool(self, key: str):
+        # psycopg2 closes returned connections beyond minconn, so keep the whole pool open.
+        return psycopg2.pool.ThreadedConnectionPool(
+            self.pool_size,
+            self.pool_size,
+            host=self.host,
+            port=self.port,
+            database=self.database,
+            user=self.user,
+            password=self.password
+        )
+
+    def _get_pooled(self, pool):
+        return pool.getconn()
+
+    def _put_pooled(self, pool, conn, prepared: bool):
+        if prepared:
+            # Prepared statements live as long as the session, so drop ours before
+            # the connection is handed to the next client.
+            conn.rollback()
+            conn.cursor().execute("DEALLOCATE ALL")
+        pool.putconn(conn)
+
+    def insert_query(self, cursor, table_name: str, columns: List[str], count: int, prepared: Set[str]) -> str:
+        placeholders = ", ".join([f"${i}" for i in range(1, count + 1)])
+        columns_str = ", ".join(columns)
+        name = f"db_client_stmt_{len(prepared)}"
+        cursor.execute(f"PREPARE {name} AS INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})")
+        prepared.add(name)
+        placeholders = _placeholders(self.placeholder, count)
+        return f"EXECUTE {name} ({placeholders})"
+
+    def insert_rows(self, cursor, table_name: str, columns: List[str], values_list: List[Tuple]):
+        columns_str = ", ".join(columns)
+        query = f"INSERT INTO {table_name} ({columns_str}) VALUES %s"
+        execute_values(cursor, query, values_list, page_size=1000)
+
+    def table_exists(self, cursor, table_name: str) -> bool:
+        # Only table-like relations count, as in information_schema.tables; indexes and sequences do not.
+        query = ("SELECT EXISTS (SELECT 1 FROM pg_class WHERE oid = to_regclass(%s) "
+                 "AND relkind IN ('r', 'p', 'v', 'm', 'f'))")
+        cursor.execute(query, (table_name,))
+        return cursor.fetchone()[0]
+
+    def column_exists(self, cursor, table_name: str, column_name: str) -> bool:
+        query = ("SELECT EXISTS (SELECT 1 FROM pg_attribute JOIN pg_class ON pg_class.oid = attrelid "
+                 "WHERE attrelid = to_regclass(%s) AND relkind IN ('r', 'p', 'v', 'm', 'f') "
+                 "AND attname = %s AND attnum > 0 AND NOT attisdropped)")
+        cursor.execute(query, (table_name, column_name))
+        return cursor.fetchone()[0]
+
+    def binary_columns(self, cursor, table_name: str) -> Set[str]:
+        query = ("SELECT attname FROM pg_attribute WHERE attrelid = to_regclass(%s) "
+                 "AND atttypid = 'bytea'::regtype AND attnum > 0 AND NOT attisdropped")
+        cursor.execute(query, (table_name,))
+        return {row[0] for row in cursor.fetchall()}
+
+    def stream_cursor(self, conn, arraysize: int):
+        # A named cursor is server-side, so rows are fetched in itersize batches instead of all at execute().
+        # WITH HOLD keeps it open across the commits other client calls make during iteration.
+        cursor = conn.cursor(name=f"db_client_cursor_{next(_cursor_ids)}", withhold=True)
+        cursor.itersize = arraysize
+        cursor.arraysize = arraysize
+        return cursor
+
+    def export_csv(self, conn, cursor, table_name: str, csv_path: str, chunk_size: int):
+        with open(csv_path, 'wb') as csvfile:
+            cursor.copy_expert(f"COPY {table_name} TO STDOUT WITH CSV HEADER", csvfile)
+
+    def import_csv(self, conn, cursor, table_name: str, csv_path: str, chunk_size: int):
+        with open(csv_path, newline='') as csvfile:
+            columns = next(csv.reader(csvfile))
+            columns_str = ", ".join(columns)
+            csvfile.seek(0)
+            cursor.copy_expert(f"COPY {table_name} ({columns_str}) FROM STDIN WITH CSV HEADER", csvfile)
+
+
+BACKENDS = {
+    'sqlite': _SqliteBackend,
+    'mariadb': _MariaBackend,
+    'postgresql': _PgBackend,
+}
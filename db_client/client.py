@@ -1,71 +1,77 @@
 import sqlite3
-import mariadb
-import psycopg2
-from typing import List, Tuple, Any
-import csv
+from typing import List, Tuple, Any, Iterable, Iterator
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import io
 import hashlib
+import hmac
+import re
+from operator import itemgetter
 
+from .backends import BACKENDS
+
+# Characters that open a literal or comment in SQLite, mapped to the text that closes it.
+_SQL_CLOSERS = {"'": "'", '"': '"', '`': '`', '[': ']', '--': '\n', '/*': '*/'}
+_SQL_TOKENS = re.compile(r"['\"`\[;]|--|/\*")
 
 class DatabaseClient:
     def __init__(self, db_type: str, host: str = '', port: int = 0, database: str = '', user: str = '',
-                 password: str = ''):
+                 password: str = '', use_pool: bool = False, pool_size: int = 5, local_infile: bool = False,
+                 pool_timeout: float = 30.0):
         self.db_type = db_type
         self.conn = None
         self.cursor = None
+        self._insert_cache = {}
+        self._prepared = set()
+        self._binary_columns = {}
+        self._in_transaction = False
 
-        if db_type == 'sqlite':
-            self.conn = sqlite3.connect(database)
-            self.cursor = self.conn.cursor()
-        elif db_type == 'mariadb':
-            self.conn = mariadb.connect(
-                host=host,
-                port=port,
-                database=database,
-                user=user,
-                password=password
-            )
-            self.cursor = self.conn.cursor()
-        elif db_type == 'postgresql':
-            self.conn = psycopg2.connect(
-                host=host,
-                port=port,
-                database=database,
-                user=user,
-                password=password
-            )
-            self.cursor = self.conn.cursor()
-        else:
+        backend = BACKENDS.get(db_type)
+        if backend is None:
             raise ValueError("Unsupported database type. Supported types are 'sqlite', 'mariadb', and 'postgresql'.")
+        self._backend = backend(host, port, database, user, password, use_pool, pool_size, local_infile,
+                                pool_timeout)
+        self.conn = self._backend.connect()
+        self.cursor = self.conn.cursor()
+        self._ph = self._backend.placeholder
 
     def create_table(self, table_name: str, columns: List[Tuple[str, str]]):
         columns_str = ", ".join([f"{col} {dtype}" for col, dtype in columns])
         query = f"CREATE TABLE IF NOT EXISTS {table_name} ({columns_str})"
         self.cursor.execute(query)
-        self.conn.commit()
+        self._binary_columns.pop(table_name, None)
+        self._commit()
 
     def insert(self, table_name: str, columns: List[str], values: Tuple):
-        placeholders = ", ".join(["%s" for _ in values])
-        columns_str = ", ".join(columns)
-        query = f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})"
+        # Only insert signatures are cached: on PostgreSQL each entry stands for a server-side prepared statement.
+        key = (table_name, tuple(columns), len(values))
+        query = self._insert_cache.get(key)
+        if query is None:
+            query = self._backend.insert_query(self.cursor, table_name, columns, len(values), self._prepared)
+            self._insert_cache[key] = query
         self.cursor.execute(query, values)
-        self.conn.commit()
+        self._commit()
 
     def batch_insert(self, table_name: str, columns: List[str], values_list: List[Tuple]):
-        placeholders = ", ".join(["%s" for _ in columns])
-        columns_str = ", ".join(columns)
-        query = f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})"
-        self.cursor.executemany(query, values_list)
-        self.conn.commit()
+        self._backend.begin(self.conn, immediate=True)
+        self._backend.insert_rows(self.cursor, table_name, columns, values_list)
+        self._commit()
+
+    def insert_many(self, table_name: str, columns: List[str], rows: Iterable[Tuple], chunk_size: int = 10000):
+        self._backend.begin(self.conn, immediate=True)
+        self._backend.insert_chunks(self.cursor, table_name, columns, rows, chunk_size)
+        self._commit()
 
     def remove(self, table_name: str, condition: str, condition_value: Tuple):
         query = f"DELETE FROM {table_name} WHERE {condition}"
         self.cursor.execute(query, condition_value)
-        self.conn.commit()
+        self._commit()
 
     def update(self, table_name: str, updates: str, condition: str, values: Tuple):
         query = f"UPDATE {table_name} SET {updates} WHERE {condition}"
         self.cursor.execute(query, values)
-        self.conn.commit()
+        self._commit()
 
     def fetch(self, table_name: str, columns: List[str], condition: str = "", condition_value: Tuple = ()):
         columns_str = ", ".join(columns)
@@ -76,14 +82,14 @@ class DatabaseClient:
         return self.cursor.fetchall()
 
     def add_value(self, table_name: str, column: str, amount: int, condition: str, condition_value: Tuple):
-        query = f"UPDATE {table_name} SET {column} = {column} + %s WHERE {condition}"
+        query = f"UPDATE {table_name} SET {column} = {column} + {self._ph} WHERE {condition}"
         self.cursor.execute(query, (amount,) + condition_value)
-        self.conn.commit()
+        self._commit()
 
     def subtract_value(self, table_name: str, column: str, amount: int, condition: str, condition_value: Tuple):
-        query = f"UPDATE {table_name} SET {column} = {column} - %s WHERE {condition}"
+        query = f"UPDATE {table_name} SET {column} = {column} - {self._ph} WHERE {condition}"
         self.cursor.execute(query, (amount,) + condition_value)
-        self.conn.commit()
+        self._commit()
 
     def is_field_empty(self, table_name: str, column: str, condition: str, condition_value: Tuple) -> bool:
         query = f"SELECT {column} FROM {table_name} WHERE {condition}"
@@ -100,51 +106,71 @@ class DatabaseClient:
     def rollback_transaction(self):
         self.conn.rollback()
 
+    @contextmanager
+    def transaction(self):
+        if self._in_transaction:
+            yield self
+            return
+        self._in_transaction = True
+        try:
+            self._backend.begin(self.conn)
+            yield self
+        except BaseException:
+            self.conn.rollback()
+            raise
+        else:
+            self.conn.commit()
+        finally:
+            self._in_transaction = False
+
+    def _commit(self):
+        # Inside transaction() the surrounding block commits once at the end.
+        if not self._in_transaction:
+            self.conn.commit()
+
     def drop_table(self, table_name: str):
         query = f"DROP TABLE IF EXISTS {table_name}"
         self.cursor.execute(query)
-        self.conn.commit()
+        self._binary_columns.pop(table_name, None)
+        self._commit()
 
     def clear_table(self, table_name: str):
         query = f"DELETE FROM {table_name}"
         self.cursor.execute(query)
-        self.conn.commit()
+        self._commit()
 
     def create_index(self, index_name: str, table_name: str, columns: List[str]):
         columns_str = ", ".join(columns)
         query = f"CREATE INDEX IF NOT EXISTS {index_name} ON {table_name} ({columns_str})"
         self.cursor.execute(query)
-        self.conn.commit()
+        self._commit()
 
     def drop_index(self, index_name: str):
         query = f"DROP INDEX IF EXISTS {index_name}"
         self.cursor.execute(query)
-        self.conn.commit()
+        self._commit()
 
     def alter_table_add_column(self, table_name: str, column: str, dtype: str):
         query = f"ALTER TABLE {table_name} ADD COLUMN {column} {dtype}"
         self.cursor.execute(query)
-        self.conn.commit()
+        self._binary_columns.pop(table_name, None)
+        self._commit()
 
     def table_exists(self, table_name: str) -> bool:
-        query = "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = 'public' AND table_name = %s"
-        self.cursor.execute(query, (table_name,))
-        return self.cursor.fetchone()[0] > 0
+        return self._backend.table_exists(self.cursor, table_name)
 
     def column_exists(self, table_name: str, column_name: str) -> bool:
-        query = "SELECT COUNT(*) FROM information_schema.columns WHERE table_name = %s AND column_name = %s"
-        self.cursor.execute(query, (table_name, column_name))
-        return self.cursor.fetchone()[0] > 0
+        return self._backend.column_exists(self.cursor, table_name, column_name)
 
     def list_tables(self) -> List[str]:
         query = "SELECT table_name FROM information_schema.tables WHERE table_schema = 'public'"
         self.cursor.execute(query)
-        return [row[0] for row in self.cursor.fetchall()]
+        return list(map(itemgetter(0), self.cursor))
 
     def list_columns(self, table_name: str) -> List[str]:
         query = "SELECT column_name FROM information_schema.columns WHERE table_name = %s"
         self.cursor.execute(query, (table_name,))
-        return [row[0] for row in self.cursor.fetchall()]
+        return list(map(itemgetter(0), self.cursor))
 
     def count_rows(self, table_name: str, condition: str = "", condition_value: Tuple = ()) -> int:
         query = f"SELECT COUNT(*) FROM {table_name}"
@@ -157,67 +183,170 @@ class DatabaseClient:
         self.cursor.execute(query, params)
         return self.cursor.fetchall()
 
-    def backup_database(self, backup_path: str):
-        with open(backup_path, 'wb') as f:
+    def iter_query(self, query: str, params: Tuple = (), arraysize: int = 10000) -> Iterator[Tuple[Any]]:
+        # A dedicated cursor keeps other client calls from resetting the result mid-iteration.
+        cursor = self._backend.stream_cursor(self.conn, arraysize)
+        try:
+            cursor.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(arraysize)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cursor.close()
+
+    def backup_database(self, backup_path: str, compress: bool = False):
+        if compress:
+            f = io.BufferedWriter(gzip.open(backup_path, 'wb', compresslevel=1), buffer_size=1 << 20)
+        else:
+            f = open(backup_path, 'wb', buffering=1 << 20)
+        with f:
+            write = f.write
             for chunk in self.conn.iterdump():
-                f.write(f"{chunk}\n".encode())
-
-    def restore_database(self, backup_path: str):
-        with open(backup_path, 'r') as f:
-            sql = f.read()
-        self.cursor.executescript(sql)
-        self.conn.commit()
-
-    def export_to_csv(self, table_name: str, csv_path: str):
-        query = f"SELECT * FROM {table_name}"
-        self.cursor.execute(query)
-        rows = self.cursor.fetchall()
-        columns = [desc[0] for desc in self.cursor.description]
-
-        with open(csv_path, 'w', newline='') as csvfile:
-            csv_writer = csv.writer(csvfile)
-            csv_writer.writerow(columns)
-            csv_writer.writerows(rows)
+                write(chunk.encode())
+                write(b"\n")
 
-    def import_from_csv(self, table_name: str, csv_path: str):
-        with open(csv_path, newline='') as csvfile:
-            csv_reader = csv.reader(csvfile)
-            columns = next(csv_reader)
-            rows = [tuple(row) for row in csv_reader]
-
-        placeholders = ", ".join(["%s" for _ in columns])
-        columns_str = ", ".join(columns)
-        query = f"INSERT INTO {table_name} ({columns_str}) VALUES ({placeholders})"
-        self.cursor.executemany(query, rows)
-        self.conn.commit()
+    def restore_database(self, backup_path: str, compress: bool = False):
+        if compress:
+            f = gzip.open(backup_path, 'rt')
+        else:
+            f = open(backup_path, 'r', buffering=1 << 20)
+        with f:
+            if not self.conn.in_transaction:
+                self.cursor.execute("BEGIN")
+            try:
+                pending = ''
+                pos = 0
+                closer = None
+                for line in f:
+                    pending += line
+                    start = 0
+                    # Literals and comments are skipped as they are scanned, so only a ';' outside them can
+                    # close a statement, and several statements on one line run one at a time.
+                    while True:
+                        if closer is not None:
+                            end = pending.find(closer, pos)
+                            if end == -1:
+                                pos = len(pending)
+                                break
+                            pos = end + len(closer)
+                            closer = None
+                            continue
+                        match = _SQL_TOKENS.search(pending, pos)
+                        if match is None:
+                            pos = len(pending)
+                            break
+                        pos = match.end()
+                        token = match.group()
+                        if token != ';':
+                            closer = _SQL_CLOSERS[token]
+                        elif sqlite3.complete_statement(pending[start:pos]):
+                            self._restore_statement(pending[start:pos])
+                            start = pos
+                    pending = pending[start:]
+                    pos -= start
+                if pending.strip():
+                    self._restore_statement(pending)
+            except Exception:
+                if not self._in_transaction:
+                    self.conn.rollback()
+                raise
+        self._commit()
+
+    def _restore_statement(self, statement: str):
+        # The dump carries its own transaction markers; the restore runs in ours.
+        if statement.strip() not in ('BEGIN TRANSACTION;', 'COMMIT;'):
+            self.cursor.execute(statement)
+
+    def export_to_csv(self, table_name: str, csv_path: str, chunk_size: int = 10000):
+        self._backend.export_csv(self.conn, self.cursor, table_name, csv_path, chunk_size)
+
+    def import_from_csv(self, table_name: str, csv_path: str, chunk_size: int = 10000):
+        try:
+            self._backend.import_csv(self.conn, self.cursor, table_name, csv_path, chunk_size)
+        except Exception:
+            if not self._in_transaction:
+                self.conn.rollback()
+            raise
+        self._commit()
+
+    def import_many_csv(self, table_name: str, csv_paths: List[str], workers: int = 4, chunk_size: int = 10000):
+        if self._backend.pool is not None:
+            # Workers share the pool with this client's own connection.
+            workers = min(workers, self._backend.pool_size - 1)
+        if not self._backend.parallel_imports or workers < 1:
+            for csv_path in csv_paths:
+                self.import_from_csv(table_name, csv_path, chunk_size)
+            return
+        with ThreadPoolExecutor(workers) as executor:
+            list(executor.map(lambda csv_path: self._import_one(table_name, csv_path, chunk_size), csv_paths))
+
+    def _import_one(self, table_name: str, csv_path: str, chunk_size: int):
+        # Each worker loads over its own (pooled, if enabled) connection and commits on its own.
+        conn = self._backend.connect()
+        try:
+            self._backend.import_csv(conn, conn.cursor(), table_name, csv_path, chunk_size)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._backend.release(conn)
+
+    @staticmethod
+    def _hash_password(password: str) -> bytes:
+        return hashlib.sha256(password.encode()).digest()
+
+    def _encode_password_hash(self, table_name: str, password_hash: bytes):
+        # Binary columns (BLOB/BYTEA) take the raw digest; text columns keep the hex form.
+        # The column types are looked up once per table so writes stay a single round trip.
+        binary_columns = self._binary_columns.get(table_name)
+        if binary_columns is None:
+            binary_columns = self._backend.binary_columns(self.cursor, table_name)
+            self._binary_columns[table_name] = binary_columns
+        return password_hash if "password" in binary_columns else password_hash.hex()
 
     def create_user(self, table_name: str, username: str, password: str, role: str):
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
+        password_hash = self._encode_password_hash(table_name, self._hash_password(password))
         self.insert(table_name, ["username", "password", "role"], (username, password_hash, role))
 
+    def create_users(self, table_name: str, users: List[Tuple[str, str, str]]):
+        rows = [(username, self._encode_password_hash(table_name, self._hash_password(password)), role)
+                for username, password, role in users]
+        self.batch_insert(table_name, ["username", "password", "role"], rows)
+
     def delete_user(self, table_name: str, username: str):
-        self.remove(table_name, "username = %s", (username,))
+        self.remove(table_name, f"username = {self._ph}", (username,))
 
     def set_password(self, table_name: str, username: str, new_password: str):
-        new_password_hash = hashlib.sha256(new_password.encode()).hexdigest()
-        self.update(table_name, "password = %s", "username = %s", (new_password_hash, username))
+        new_password_hash = self._encode_password_hash(table_name, self._hash_password(new_password))
+        self.update(table_name, f"password = {self._ph}", f"username = {self._ph}", (new_password_hash, username))
 
     def verify_password(self, table_name: str, username: str, password: str) -> bool:
-        password_hash = hashlib.sha256(password.encode()).hexdigest()
-        query = f"SELECT password FROM {table_name} WHERE username = %s"
+        query = f"SELECT password FROM {table_name} WHERE username = {self._ph}"
         self.cursor.execute(query, (username,))
         stored_password_hash = self.cursor.fetchone()
-        return stored_password_hash is not None and stored_password_hash[0] == password_hash
+        if stored_password_hash is None or stored_password_hash[0] is None:
+            return False
+        stored = stored_password_hash[0]
+        if isinstance(stored, str):
+            # Text columns hold the hex digest.
+            try:
+                stored = bytes.fromhex(stored)
+            except ValueError:
+                return False
+        return hmac.compare_digest(bytes(stored), self._hash_password(password))
 
     def grant_permission(self, table_name: str, username: str, permission: str):
         self.insert(table_name, ["username", "permission"], (username, permission))
 
     def revoke_permission(self, table_name: str, username: str, permission: str):
-        self.remove(table_name, "username = %s AND permission = %s", (username, permission))
+        self.remove(table_name, f"username = {self._ph} AND permission = {self._ph}", (username, permission))
 
     def get_permissions(self, table_name: str, username: str) -> List[str]:
-        result = self.fetch(table_name, ["permission"], "username = %s", (username,))
-        return [row[0] for row in result]
+        result = self.fetch(table_name, ["permission"], f"username = {self._ph}", (username,))
+        return list(map(itemgetter(0), result))
 
     def log_action(self, table_name: str, action: str, details: str):
         self.insert(table_name, ["action", "details"], (action, details))
@@ -236,7 +365,4 @@ class DatabaseClient:
 
     def __del__(self):
         if self.conn:
-            self.conn.close()
-
-
-
+            self._backend.release(self.conn, bool(self._prepared))
@@ -18,6 +18,7 @@ setup(
     python_requires='>=3.6',
     install_requires=[
         'mariadb',
-        'psycopg2'
+        'psycopg2',
+        'asyncpg'
     ],
 )
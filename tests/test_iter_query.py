@@ -0,0 +1,26 @@
+import unittest
+
+from db_client import DatabaseClient
+
+
+class IterQueryTest(unittest.TestCase):
+    def setUp(self):
+        self.db = DatabaseClient(db_type='sqlite', database=':memory:')
+        self.db.create_table("q", [("a", "INT")])
+        self.db.batch_insert("q", ["a"], [(i,) for i in range(6)])
+
+    def test_other_calls_do_not_cut_iteration_short(self):
+        rows = []
+        for row in self.db.iter_query("SELECT a FROM q ORDER BY a", arraysize=2):
+            rows.append(row)
+            self.db.count_rows("q")
+        self.assertEqual(rows, [(i,) for i in range(6)])
+
+    def test_client_cursor_is_left_untouched(self):
+        arraysize = self.db.cursor.arraysize
+        list(self.db.iter_query("SELECT a FROM q", arraysize=2))
+        self.assertEqual(self.db.cursor.arraysize, arraysize)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import unittest
+
+from db_client import DatabaseClient
+
+
+class RestoreDatabaseTest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DatabaseClient(db_type='sqlite', database=':memory:')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, sql: str) -> str:
+        path = os.path.join(self.tmpdir.name, 'backup.sql')
+        with open(path, 'w') as f:
+            f.write(sql)
+        return path
+
+    def test_several_statements_on_one_line(self):
+        self.db.restore_database(self._write("CREATE TABLE q(a); INSERT INTO q VALUES (1);\n"))
+        self.assertEqual(self.db.fetch("q", ["a"]), [(1,)])
+
+    def test_statement_followed_by_comment(self):
+        path = self._write("CREATE TABLE q(a); -- table\nINSERT INTO q VALUES (1); -- first row\n"
+                           "INSERT INTO q VALUES (2);\n")
+        self.db.restore_database(path)
+        self.assertEqual(self.db.fetch("q", ["a"]), [(1,), (2,)])
+
+    def test_separators_inside_literals_and_comments(self):
+        path = self._write("CREATE TABLE \"q;\"(a); /* skip; this */ INSERT INTO \"q;\" VALUES ('it''s; -- /* ok');\n"
+                           "INSERT INTO \"q;\" VALUES ('" + ";" * 1000 + "'); -- done;\n")
+        self.db.restore_database(path)
+        self.assertEqual(self.db.fetch('"q;"', ["a"]), [("it's; -- /* ok",), (";" * 1000,)])
+
+    def test_backup_round_trip_keeps_semicolons_in_values(self):
+        self.db.create_table("q", [("a", "TEXT")])
+        self.db.insert("q", ["a"], ("one;\ntwo; three",))
+        path = os.path.join(self.tmpdir.name, 'backup.sql.gz')
+        self.db.backup_database(path, compress=True)
+
+        restored = DatabaseClient(db_type='sqlite', database=':memory:')
+        restored.restore_database(path, compress=True)
+        self.assertEqual(restored.fetch("q", ["a"]), [("one;\ntwo; three",)])
+
+
+if __name__ == '__main__':
+    unittest.main()